@@ -18,7 +18,7 @@ def installPackages(packages_to_install):
             ui.messageBox('Failed to auto install packages. Please install manually using the following command : ' + install_str, 'Error', adsk.core.MessageBoxButtonTypes.OKButtonType)
             raise SystemExit(1, 'Failed to auto install packages')
 
-installPackages([('numpy', 'numpy'), ('gmsh', 'gmsh'), ('pyyaml', 'yaml')]) # list format : [(pip_name, import_name), ...]
+installPackages([('numpy', 'numpy'), ('scipy', 'scipy'), ('gmsh', 'gmsh'), ('pyyaml', 'yaml')]) # list format : [(pip_name, import_name), ...]
 
 import numpy as np
 import yaml
@@ -65,14 +65,10 @@ class MainHandler():
     def generateBlades(self) -> None:
         blades_config = self.config['blades']
         intermediate_profiles: int = self.config['intermediate_profiles']
+        pool = ConstructionPool(self.app)  # planes and sketches shared by all the blades
         for i, blade_config in enumerate(blades_config):
-            if type(blade_config["angle"]) is list:
-                for angle in blade_config["angle"]:
-                    blade_config_temp = blade_config.copy()
-                    blade_config_temp["angle"] = angle
-                    self.blades.append(Blade(self.app, blade_config_temp, intermediate_profiles, i))
-            else:
-                self.blades.append(Blade(self.app, blade_config, intermediate_profiles, i))
+            for blade_config_temp in expandBladeConfig(blade_config):
+                self.blades.append(Blade(self.app, blade_config_temp, intermediate_profiles, i, pool))
         for blade in self.blades:
             blade.build()
 
@@ -1,5 +1,18 @@
 from .point_generator import PointGenerator
 from .naca import NACA4
-from .gmsh_api import MeshGenerator
 from .profile import Profile
-from .blade import Blade
\ No newline at end of file
+from .profile_config import ProfileConfig, expandBladeConfig
+from .surface import BladeSurface
+
+# gmsh and the Fusion360 API (adsk) are not needed by the modules above, which can be used outside of Fusion360 (CFD, CAM, ...)
+try:
+    from .gmsh_api import MeshGenerator
+except ModuleNotFoundError as e:
+    if e.name is None or e.name.split('.')[0] != 'gmsh':
+        raise
+try:
+    from .construction_pool import ConstructionPool
+    from .blade import Blade
+except ModuleNotFoundError as e:
+    if e.name is None or e.name.split('.')[0] != 'adsk':
+        raise
@@ -1,16 +1,16 @@
 import adsk.core, adsk.fusion
-from adsk.core import Point3D, Vector3D, Matrix3D, ObjectCollection, ValueInput
+from adsk.core import Point3D, Vector3D, Matrix3D, ObjectCollection
 import numpy as np
 
 # Local imports
-from .naca import NACA4
 from .profile import Profile
-from .profile_config import ProfileConfig
+from .profile_config import ProfileConfig, interpolateProfileConfigs
+from .construction_pool import ConstructionPool
 
 RAIL_NS = ["0", "X-1"] # where X is half the number of points in the profile
 # "int(X//2)", "3*int(X//2)", "int(X//4)", "3*int(X//4)", "5*int(X//4)", "7*int(X//4)"
 class Blade():
-    def __init__(self, app, blade_config: dict, intermediate_profiles: int, blade_no: int) -> None:
+    def __init__(self, app, blade_config: dict, intermediate_profiles: int, blade_no: int, pool: ConstructionPool = None) -> None:
         # Blade configuration
         self.angle: float = blade_config['angle'] / 180 * np.pi
         self.profiles_dict: dict = blade_config['profiles']
@@ -21,6 +21,7 @@ class Blade():
         # API objects
         self.app = app
         self.ui = app.userInterface
+        self.pool: ConstructionPool = pool if pool is not None else ConstructionPool(app)  # construction objects shared with the other blades
         self.rails: list[ObjectCollection] = [ObjectCollection.create() for _ in range(len(RAIL_NS))]  # len(RAIL_NS) extrusion rails, collection of Points
         
         self.rail_splines = []
@@ -37,43 +38,19 @@ class Blade():
     def __load_config(self) -> None:
         """Creates profileConfig objects from the self.profiles_dict and create self.profilesConfig list."""
         for profile_config in self.profiles_dict:
-            self.profiles_config.append(ProfileConfig(
-                radial_offset = profile_config['radial_offset'],
-                naca = NACA4(profile_config['naca']),
-                c = profile_config['c'],
-                angle = profile_config['angle'],
-                colinear_offset = profile_config['colinear_offset']
-            ))
+            self.profiles_config.append(ProfileConfig.buildFromDict(profile_config))
 
     def __interpolate_profiles(self) -> None:
         """Interpolates the profiles and complete the self.profilesConfig list."""
         if self.intermediate_profiles == 0:
             return
-        for i in range(len(self.profiles_config) - 1):
-            for j in range(self.intermediate_profiles):
-                j += 1
-                t = j / (self.intermediate_profiles + 1)
-                self.profiles_config.append(self.profiles_config[i].interpolate(self.profiles_config[i + 1], t))
-        self.profiles_config.sort(key=lambda x: x.radial_offset, reverse=False)
+        self.profiles_config = interpolateProfileConfigs(self.profiles_config, self.intermediate_profiles)
         
 
-    def __createOffsetPlane(self, radial_offset: float) -> adsk.fusion.ConstructionPlane:
-        """Creates a new offset plane and return it."""
-        design = self.app.activeProduct
-        rootComp = design.rootComponent
-        planes = rootComp.constructionPlanes
-        planeInput = planes.createInput()
-        planeInput.setByOffset(
-            rootComp.xYConstructionPlane, 
-            ValueInput.createByReal(radial_offset)
-        )
-        return planes.add(planeInput)
-
     def __createOffsetPlanesAndGenerateProfilesObject(self) -> None:
-        """Creates all the offset planes from the interpretation of the self.profiles dict."""
+        """Gets the offset planes (shared between blades by the pool) from the interpretation of the self.profiles dict."""
         for i, profile_config in enumerate(self.profiles_config):
-            profile_plane = self.__createOffsetPlane(profile_config.radial_offset)
-            profile_plane.name = f"Plane for profile {i} in blade {self.blade_no}"
+            profile_plane = self.pool.getOffsetPlane(profile_config.radial_offset)
             res = Profile(
                 plane = profile_plane,
                 naca = profile_config.naca,
@@ -88,17 +65,6 @@ class Blade():
     def __generateProfile(self, profile: Profile) -> None:
         """Generates a profile in the 3D modeling from a profile object."""
 
-        design = self.app.activeProduct
-        rootComp = design.rootComponent  # root component (contains sketches, volumnes, etc)
-        
-        # Getting the plane object created earlier
-        plane = profile.plane
-        
-        # Creating a sketch from the plane
-        sketch = rootComp.sketches.add(plane)  # in the XZ plane
-        # Creating a point collection
-        points = ObjectCollection.create()  # object collection that contains points
-
         # Define the points the spline with fit through.
         naca_points = profile.getPoints()
 
@@ -107,27 +73,20 @@ class Blade():
             j = eval(RAIL_NS[i].replace('X', 'profile.n'))
             rail.add(Point3D.create(*naca_points[j], profile.radial_offset))
 
-        # Adding the points to the collection (i.e. to the sketch)
-        for x, y in naca_points:
-            p = Point3D.create(x, y, 0)
-            points.add(p)
-
-        # Drawing the spline
-        sketch.sketchCurves.sketchFittedSplines.add(points)
-        profile.sketch = sketch
-        profile.sketch.name = f"Sketch for profile {profile.profile_no} in blade {self.blade_no}"
+        # Drawing the spline (or reusing the sketch of an identical profile drawn by another blade)
+        profile.sketch = self.pool.getProfileSketch(profile, naca_points)
 
     def __generateProfiles(self) -> None:
         """Generates all the profiles in the 3D modeling from the self.config dict."""
         for profile in self.profiles:
             self.__generateProfile(profile) 
 
-        # generate rails
-        design = self.app.activeProduct
-        rootComp = design.rootComponent  # root component (contains sketches, volumnes, etc)
-        self.verticalSketch = rootComp.sketches.add(rootComp.xYConstructionPlane)
-        self.verticalSketch.name = f"Rail sketch for blade {self.blade_no}"
-        self.rail_splines = [self.verticalSketch.sketchCurves.sketchFittedSplines.add(rail_pts) for rail_pts in self.rails]
+        # generate rails (all blades draw their rails in the same sketch, identical blades share them)
+        self.verticalSketch = self.pool.getRailSketch()
+        self.rail_splines = self.pool.getRailSplines(self.profiles)
+        if self.rail_splines is None:
+            self.rail_splines = [self.verticalSketch.sketchCurves.sketchFittedSplines.add(rail_pts) for rail_pts in self.rails]
+            self.pool.addRailSplines(self.profiles, self.rail_splines)
 
     def __hideConstruction(self) -> None:
         """Hides all the construction planes and sketches."""
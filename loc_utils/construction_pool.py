@@ -0,0 +1,101 @@
+import adsk.core, adsk.fusion
+from adsk.core import Point3D, ObjectCollection, ValueInput
+import numpy as np
+
+# Local imports
+from .profile import Profile
+
+DEFAULT_TOLERANCE = 1e-6 # cm, two lengths (radial offsets, chords, ...) closer than this are considered equal
+DEFAULT_ANGLE_TOLERANCE = 1e-6 # degrees, two profile angles closer than this are considered equal
+
+class ConstructionPool():
+    """Registry of the construction objects (planes, profile sketches, rails) shared by all the blades."""
+
+    def __init__(self, app, tolerance: float = DEFAULT_TOLERANCE, angle_tolerance: float = DEFAULT_ANGLE_TOLERANCE) -> None:
+        self.app = app
+        self.tolerance: float = tolerance
+        self.angle_tolerance: float = angle_tolerance
+
+        # The registries are small (one entry per station or per distinct profile), they are searched linearly
+        self.planes: list[tuple[float, adsk.fusion.ConstructionPlane]] = []  # (radial offset, plane)
+        self.sketches: list[tuple[tuple, adsk.fusion.Sketch]] = []  # (profile signature, profile sketch)
+        self.rail_splines: list[tuple[list[tuple], list]] = []  # (profile signatures, rail splines)
+        self.rail_sketch: adsk.fusion.Sketch = None
+
+    def profileSignature(self, profile: Profile) -> tuple:
+        """Returns the parameters defining the geometry of a profile (two profiles with matching signatures draw the same sketch)."""
+        return (profile.radial_offset, profile.naca.m, profile.naca.p, profile.naca.t, profile.c, profile.angle, profile.colinear_offset, profile.n)
+
+    def __sameProfile(self, signature: tuple, other: tuple) -> bool:
+        """Compares two profile signatures, lengths within self.tolerance and angles within self.angle_tolerance."""
+        radial_offset, m, p, t, c, angle, colinear_offset, n = signature
+        other_radial_offset, other_m, other_p, other_t, other_c, other_angle, other_colinear_offset, other_n = other
+        return (
+            (m, p, t, n) == (other_m, other_p, other_t, other_n)
+            and abs(radial_offset - other_radial_offset) <= self.tolerance
+            and abs(c - other_c) <= self.tolerance
+            and abs(colinear_offset - other_colinear_offset) <= self.tolerance
+            and abs(angle - other_angle) <= self.angle_tolerance
+        )
+
+    def getOffsetPlane(self, radial_offset: float) -> adsk.fusion.ConstructionPlane:
+        """Returns the offset plane at radial_offset, creating it if no plane exists at that station yet."""
+        for plane_offset, plane in self.planes:
+            if abs(plane_offset - radial_offset) <= self.tolerance:
+                return plane
+
+        rootComp = self.app.activeProduct.rootComponent
+        planes = rootComp.constructionPlanes
+        planeInput = planes.createInput()
+        planeInput.setByOffset(
+            rootComp.xYConstructionPlane,
+            ValueInput.createByReal(radial_offset)
+        )
+        plane = planes.add(planeInput)
+        plane.name = f"Plane at radial offset {radial_offset}"
+        self.planes.append((radial_offset, plane))
+        return plane
+
+    def getProfileSketch(self, profile: Profile, points: np.ndarray) -> adsk.fusion.Sketch:
+        """Returns the sketch of an identical profile, or draws the spline through points on the profile plane."""
+        signature = self.profileSignature(profile)
+        for sketch_signature, sketch in self.sketches:
+            if self.__sameProfile(signature, sketch_signature):
+                return sketch
+
+        # Creating a sketch from the plane
+        rootComp = self.app.activeProduct.rootComponent
+        sketch = rootComp.sketches.add(profile.plane)
+        # Creating a point collection
+        spline_points = ObjectCollection.create()  # object collection that contains points
+
+        # Adding the points to the collection (i.e. to the sketch)
+        for x, y in points:
+            spline_points.add(Point3D.create(x, y, 0))
+
+        # Drawing the spline
+        sketch.sketchCurves.sketchFittedSplines.add(spline_points)
+        sketch_no = sum(abs(sketch_signature[0] - profile.radial_offset) <= self.tolerance for sketch_signature, _ in self.sketches)
+        sketch.name = f"Profile sketch {sketch_no} at radial offset {profile.radial_offset}"
+        self.sketches.append((signature, sketch))
+        return sketch
+
+    def getRailSketch(self) -> adsk.fusion.Sketch:
+        """Returns the sketch holding the rails of every blade, creating it on first use."""
+        if self.rail_sketch is None:
+            rootComp = self.app.activeProduct.rootComponent
+            self.rail_sketch = rootComp.sketches.add(rootComp.xYConstructionPlane)
+            self.rail_sketch.name = "Rail sketch"
+        return self.rail_sketch
+
+    def getRailSplines(self, profiles: list[Profile]) -> list:
+        """Returns the rail splines already drawn through identical profiles, or None."""
+        signatures = [self.profileSignature(profile) for profile in profiles]
+        for rail_signatures, rail_splines in self.rail_splines:
+            if len(rail_signatures) == len(signatures) and all(self.__sameProfile(a, b) for a, b in zip(signatures, rail_signatures)):
+                return rail_splines
+        return None
+
+    def addRailSplines(self, profiles: list[Profile], rail_splines: list) -> None:
+        """Registers the rail splines drawn through a list of profiles."""
+        self.rail_splines.append(([self.profileSignature(profile) for profile in profiles], rail_splines))
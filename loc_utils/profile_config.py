@@ -9,6 +9,17 @@ class ProfileConfig:
         self.angle = angle
         self.colinear_offset = colinear_offset
 
+    @classmethod
+    def buildFromDict(cls, profile_dict: dict) -> ProfileConfig:
+        """Builds a profile config from one entry of the 'profiles' list of a blade config."""
+        return cls(
+            radial_offset = profile_dict['radial_offset'],
+            naca = NACA4(profile_dict['naca']),
+            c = profile_dict['c'],
+            angle = profile_dict['angle'],
+            colinear_offset = profile_dict['colinear_offset']
+        )
+
     def interpolate(self, other: ProfileConfig, t):
         return ProfileConfig(
             radial_offset = self.radial_offset + t * (other.radial_offset - self.radial_offset),
@@ -17,4 +28,25 @@ class ProfileConfig:
             angle = self.angle + t * (other.angle - self.angle),
             colinear_offset = self.colinear_offset + t * (other.colinear_offset - self.colinear_offset)
         )
-    
+
+def interpolateProfileConfigs(profiles_config: list[ProfileConfig], intermediate_profiles: int) -> list[ProfileConfig]:
+    """Adds intermediate_profiles interpolated profiles between every consecutive profiles and sorts them by radial offset."""
+    res = list(profiles_config)
+    for i in range(len(profiles_config) - 1):
+        for j in range(intermediate_profiles):
+            j += 1
+            t = j / (intermediate_profiles + 1)
+            res.append(profiles_config[i].interpolate(profiles_config[i + 1], t))
+    res.sort(key=lambda x: x.radial_offset, reverse=False)
+    return res
+
+def expandBladeConfig(blade_config: dict) -> list[dict]:
+    """Expands a blade config whose angle is a list into one blade config per angle."""
+    if type(blade_config["angle"]) is not list:
+        return [blade_config]
+    res = []
+    for angle in blade_config["angle"]:
+        blade_config_temp = blade_config.copy()
+        blade_config_temp["angle"] = angle
+        res.append(blade_config_temp)
+    return res
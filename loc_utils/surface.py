@@ -0,0 +1,373 @@
+from __future__ import annotations
+import numpy as np
+from scipy.interpolate import CubicSpline
+from scipy.spatial import cKDTree
+
+# Local imports
+from .profile import Profile
+from .profile_config import ProfileConfig, interpolateProfileConfigs, expandBladeConfig
+
+CHUNK_SIZE = 65536 # number of (s, u) parameters evaluated at once, bounds the memory used by large batches
+MAX_STEP_HALVINGS = 10 # backtracking of the Newton steps in BladeSurface.getClosestPoints
+STEP_TOLERANCE = 1e-12 # (s, u) step below which a point has converged in BladeSurface.getClosestPoints
+SECTION_CHUNK_SIZE = 4096 # number of points compared at once with the section polygon at their radius (2n+1 vertices each)
+SEED_CANDIDATES = 8 # closest surface samples looked up in the KD-tree to seed the closest point queries
+SEED_COARSENING = 8 # the coarse KD-tree keeps one sample every SEED_COARSENING in s and u
+SEED_FAR_FACTOR = 4 # points further than SEED_FAR_FACTOR coarse sample spacings are seeded from the coarse KD-tree only
+
+class BladeSurface():
+    """
+    Parametric surface of a blade, in world coordinates (after the blade translation and rotation).
+
+    - s in [0, 1] is the spanwise parameter (0 at the inner profile, 1 at the outer profile)
+    - u in [0, 1] is the chordwise parameter along the profile (trailing edge -> upper side -> leading edge -> lower side -> trailing edge)
+
+    The sections are closed at the trailing edge, so u is periodic (u and u + 1 are the same point) and the
+    sharp trailing edge is rounded over the last interval between two profile points.
+    The (s, u) parametrization describes the lateral surface only, the root and tip faces (the sections at s = 0 and
+    s = 1) are included in the signed distances.
+    """
+
+    def __init__(self, blade_config: dict, intermediate_profiles: int = 0, n: int = 100) -> None:
+        # Blade configuration
+        if type(blade_config['angle']) is list:
+            raise ValueError("The blade config has several angles, use BladeSurface.buildFromBladeConfig to get one surface per angle")
+        self.angle: float = blade_config['angle'] / 180 * np.pi
+        self.radial_blade_offset: float = blade_config['radial_blade_offset']
+        self.vertical_blade_offset: float = blade_config.get('vertical_blade_offset', 0)
+        self.n: int = n
+
+        profiles_config = [ProfileConfig.buildFromDict(profile_dict) for profile_dict in blade_config['profiles']]
+        profiles_config = interpolateProfileConfigs(profiles_config, intermediate_profiles)
+        if len(profiles_config) < 2:
+            raise ValueError("A blade surface needs at least 2 profiles")
+
+        # Sections (same points as the sketches drawn in Fusion360)
+        self.profiles: list[Profile] = [Profile(
+            plane = None,
+            naca = profile_config.naca,
+            c = profile_config.c,
+            angle = profile_config.angle,
+            radial_offset = profile_config.radial_offset,
+            colinear_offset = profile_config.colinear_offset,
+            profile_no = i,
+            n = n
+        ) for i, profile_config in enumerate(profiles_config)]
+        sections = np.stack([profile.getPoints() for profile in self.profiles], axis=1)  # (2n+1, K, 2)
+        sections[-1] = sections[0]  # the trailing edge is closed, make it exact for the periodic splines
+        self.sections: np.ndarray = sections
+        self.radial_offsets: np.ndarray = np.array([profile.radial_offset for profile in self.profiles])
+        self.r_min: float = self.radial_offsets[0]
+        self.r_max: float = self.radial_offsets[-1]
+
+        # Cached splines: chordwise through every section at once, spanwise as a basis over the sections
+        self.u_knots: np.ndarray = np.linspace(0.0, 1.0, sections.shape[0])
+        self.section_splines = CubicSpline(self.u_knots, sections, axis=0, bc_type='periodic')
+        self.section_splines_du = self.section_splines.derivative()
+        self.section_splines_duu = self.section_splines.derivative(2)
+        self.span_basis = CubicSpline(self.radial_offsets, np.eye(len(self.profiles)), axis=0, bc_type='natural')
+        self.span_basis_dr = self.span_basis.derivative()
+        self.span_basis_drr = self.span_basis.derivative(2)
+
+        # Largest gap between the section splines and their polygons, below which isInside is not reliable
+        u_mid = (self.u_knots[:-1] + self.u_knots[1:]) / 2
+        sagitta = self.section_splines(u_mid) - (sections[:-1] + sections[1:]) / 2
+        self.polygon_tolerance: float = 2 * np.max(np.linalg.norm(sagitta, axis=-1))
+
+        # World transform (same as Blade.__translateSelf and Blade.__rotateSelf)
+        inner_points = self.profiles[0].points
+        self.med_x: float = (np.max(inner_points[::, 0]) + np.min(inner_points[::, 0])) / 2
+        self.translation: np.ndarray = np.array([-self.med_x, self.vertical_blade_offset, self.radial_blade_offset])
+        self.rotation: np.ndarray = np.array([
+            [np.cos(self.angle), 0, np.sin(self.angle)],
+            [0, 1, 0],
+            [-np.sin(self.angle), 0, np.cos(self.angle)]
+        ])
+
+        # Acceleration structure for the closest point queries: KD-trees over surface samples, spanwise as dense as chordwise.
+        # Far from the blade the fine tree is slow (many samples are almost equidistant) and a coarse one is enough.
+        spacing = np.mean(np.linalg.norm(np.diff(sections, axis=0), axis=-1))
+        span_levels = max(2, int(np.ceil((self.r_max - self.r_min) / spacing)) + 1)
+        s_samples, u_samples = np.meshgrid(np.linspace(0.0, 1.0, span_levels), self.u_knots[:-1], indexing='ij')  # u = 1 is u = 0
+        self.tree_params: np.ndarray = np.column_stack((s_samples.ravel(), u_samples.ravel()))
+        self.tree: cKDTree = cKDTree(self.getPoints(self.tree_params[:, 0], self.tree_params[:, 1]))
+        coarse = (slice(None, None, SEED_COARSENING), slice(None, None, SEED_COARSENING))
+        self.coarse_tree_params: np.ndarray = np.column_stack((s_samples[coarse].ravel(), u_samples[coarse].ravel()))
+        self.coarse_tree: cKDTree = cKDTree(self.getPoints(self.coarse_tree_params[:, 0], self.coarse_tree_params[:, 1]))
+        self.seed_far_distance: float = SEED_FAR_FACTOR * SEED_COARSENING * spacing
+
+    @classmethod
+    def buildFromBladeConfig(cls, blade_config: dict, intermediate_profiles: int = 0, n: int = 100) -> list[BladeSurface]:
+        """Builds one surface per blade described by a blade config (several when its angle is a list, as in MainHandler.generateBlades)."""
+        return [cls(blade_config_temp, intermediate_profiles, n) for blade_config_temp in expandBladeConfig(blade_config)]
+
+    def __repr__(self):
+        return f"BladeSurface: {len(self.profiles)} sections from r={self.r_min} to r={self.r_max}, angle={self.angle / np.pi * 180}"
+
+    def __evaluateChunk(self, s: np.ndarray, u: np.ndarray, order: int):
+        """
+        Evaluates the surface in world coordinates for 1D arrays s and u, with its derivatives wrt s and u up to order:
+        points, then (d_s, d_u) if order >= 1, then (d_ss, d_su, d_uu) if order >= 2.
+        """
+        r = self.r_min + s * (self.r_max - self.r_min)
+        W = self.span_basis(r)  # (M, K)
+        P = self.section_splines(u)  # (M, K, 2)
+        local = np.column_stack((np.einsum('mk,mkd->md', W, P), r))
+        points = (local + self.translation) @ self.rotation.T
+        if order == 0:
+            return (points,)
+
+        span = self.r_max - self.r_min
+        zeros = np.zeros(len(r))
+        dW = self.span_basis_dr(r)
+        dP = self.section_splines_du(u)
+        d_s = np.column_stack((np.einsum('mk,mkd->md', dW, P), np.ones(len(r)))) * span
+        d_u = np.column_stack((np.einsum('mk,mkd->md', W, dP), zeros))
+        if order == 1:
+            return points, d_s @ self.rotation.T, d_u @ self.rotation.T
+
+        d_ss = np.column_stack((np.einsum('mk,mkd->md', self.span_basis_drr(r), P), zeros)) * span**2
+        d_su = np.column_stack((np.einsum('mk,mkd->md', dW, dP), zeros)) * span
+        d_uu = np.column_stack((np.einsum('mk,mkd->md', W, self.section_splines_duu(u)), zeros))
+        return tuple(res @ self.rotation.T if i else res for i, res in enumerate((points, d_s, d_u, d_ss, d_su, d_uu)))
+
+    def __evaluate(self, s, u, order: int = 0):
+        """
+        Evaluates the surface chunk by chunk, s and u are broadcast together.
+        Returns the flat (M, 3) points (or the tuple of points and derivatives if order > 0) and the broadcast shape.
+        """
+        s, u = np.broadcast_arrays(np.asarray(s, dtype=float), np.asarray(u, dtype=float))
+        shape = s.shape
+        s = np.clip(s.ravel(), 0.0, 1.0)
+        u = np.mod(u.ravel(), 1.0)
+        chunks = [self.__evaluateChunk(s[i:i+CHUNK_SIZE], u[i:i+CHUNK_SIZE], order) for i in range(0, len(s), CHUNK_SIZE)]
+        if chunks:
+            res = tuple(np.concatenate(arrays) for arrays in zip(*chunks))
+        else:
+            res = (np.empty((0, 3)),) * (1 + 2 * order + (order == 2))
+        return (res if order else res[0]), shape
+
+    def getPoints(self, s, u) -> np.ndarray:
+        """Returns the surface points at the (s, u) parameters, with shape broadcast(s, u).shape + (3,)."""
+        points, shape = self.__evaluate(s, u)
+        return points.reshape(shape + (3,))
+
+    def getNormals(self, s, u) -> np.ndarray:
+        """Returns the outward unit normals at the (s, u) parameters, with shape broadcast(s, u).shape + (3,)."""
+        (_, d_s, d_u), shape = self.__evaluate(s, u, order=1)
+        normals = np.cross(d_u, d_s)
+        norms = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals = np.divide(normals, norms, out=np.zeros_like(normals), where=norms > 0)
+        return normals.reshape(shape + (3,))
+
+    def __toLocal(self, points: np.ndarray) -> np.ndarray:
+        """Brings (M, 3) world points back in the blade coordinates (before the translation and rotation), z being the radius."""
+        return points @ self.rotation - self.translation
+
+    def __sectionPolygons(self, r: np.ndarray) -> np.ndarray:
+        """Returns the (M, 2n+1, 2) section polygons at the radii r (clipped to the blade span), closed at the trailing edge."""
+        W = self.span_basis(np.clip(r, self.r_min, self.r_max))  # (M, K)
+        K = len(self.profiles)
+        return (W @ self.sections.transpose(1, 0, 2).reshape(K, -1)).reshape(len(r), -1, 2)
+
+    def __sectionChunk(self, points: np.ndarray, seed: bool, inside: bool):
+        """
+        Builds the section polygon at the radius of each (M, 3) world point once and uses it to return
+        - if seed, starting (s, u) parameters: the closest of the KD-tree samples and of their vertices on the section
+        - if inside, the even-odd test of the point against the section (beyond the root and tip profiles is outside)
+        """
+        local = self.__toLocal(points)
+        r = local[:, 2]
+        polygons = self.__sectionPolygons(r)
+        res_s, res_u, res_inside = None, None, None
+
+        if seed:
+            # Candidates: the closest samples of the KD-tree and the same chordwise vertices on the section at the exact radius
+            M = len(points)
+            sample_distances, idx = self.coarse_tree.query(points, SEED_CANDIDATES, workers=-1)
+            sample_s = self.coarse_tree_params[idx, 0]
+            sample_u = self.coarse_tree_params[idx, 1]
+            near = sample_distances[:, 0] < self.seed_far_distance
+            if np.any(near):
+                sample_distances[near], idx = self.tree.query(points[near], SEED_CANDIDATES, workers=-1)
+                sample_s[near] = self.tree_params[idx, 0]
+                sample_u[near] = self.tree_params[idx, 1]
+            vertices = polygons[np.arange(M)[:, None], np.rint(sample_u * (len(self.u_knots) - 1)).astype(int)]
+            r_clipped = np.clip(r, self.r_min, self.r_max)
+            vertex_distances2 = np.sum((vertices - local[:, None, :2])**2, axis=2) + ((r - r_clipped)**2)[:, None]
+
+            candidates_s = np.hstack((sample_s, np.repeat(((r_clipped - self.r_min) / (self.r_max - self.r_min))[:, None], SEED_CANDIDATES, axis=1)))
+            candidates_u = np.hstack((sample_u, sample_u))
+            best = np.argmin(np.hstack((sample_distances**2, vertex_distances2)), axis=1)
+            res_s = candidates_s[np.arange(M), best]
+            res_u = candidates_u[np.arange(M), best]
+
+        if inside:
+            res_inside = self.__insidePolygons(local, polygons) & (r >= self.r_min) & (r <= self.r_max)
+
+        return res_s, res_u, res_inside
+
+    @staticmethod
+    def __insidePolygons(local: np.ndarray, polygons: np.ndarray) -> np.ndarray:
+        """Even-odd test of the (x, y) of (M, 3) local points against closed (M, 2n+1, 2) polygons (or one (1, 2n+1, 2) polygon for all)."""
+        x0, y0 = polygons[:, :-1, 0], polygons[:, :-1, 1]
+        x1, y1 = polygons[:, 1:, 0], polygons[:, 1:, 1]
+        x, y = local[:, 0:1], local[:, 1:2]
+        crosses = (y0 > y) != (y1 > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+        return np.sum(crosses & (x < x_cross), axis=1) % 2 == 1
+
+    def __sections(self, points: np.ndarray, seed: bool, inside: bool):
+        """Runs __sectionChunk chunk by chunk over (M, 3) world points."""
+        chunks = [self.__sectionChunk(points[i:i+SECTION_CHUNK_SIZE], seed, inside) for i in range(0, len(points), SECTION_CHUNK_SIZE)]
+        return tuple(np.concatenate([chunk[j] for chunk in chunks]) if chunks and chunks[0][j] is not None else None for j in range(3))
+
+    def __capDistances(self, points: np.ndarray, distances: np.ndarray) -> np.ndarray:
+        """
+        Returns the distances from (M, 3) world points to the root and tip faces (the root and tip sections) where they are
+        shorter than the distances to the lateral surface, inf elsewhere. A point that does not project inside a face is
+        closest to its edge, which belongs to the lateral surface.
+        """
+        cap_distances = np.full(len(points), np.inf)
+        for i in range(0, len(points), SECTION_CHUNK_SIZE):
+            local = self.__toLocal(points[i:i+SECTION_CHUNK_SIZE])
+            for k, r_cap in ((0, self.r_min), (-1, self.r_max)):
+                plane_distances = np.abs(local[:, 2] - r_cap)
+                # Only the points closer to the face plane than to the rest of the blade need the polygon test
+                closer = np.flatnonzero(plane_distances < np.minimum(distances, cap_distances)[i:i+SECTION_CHUNK_SIZE])
+                on_face = closer[self.__insidePolygons(local[closer], self.sections[None, :, k])]
+                cap_distances[i + on_face] = plane_distances[on_face]
+        return cap_distances
+
+    def getClosestPoints(self, points, iterations: int = 30):
+        """
+        Projects points (shape (..., 3)) onto the surface.
+        Each point starts from the closest of its KD-tree samples and of their vertices on the section at its radius,
+        and is then refined by Newton iterations on (s, u).
+        Returns (closest_points, s, u).
+        """
+        points = np.asarray(points, dtype=float)
+        shape = points.shape[:-1]
+        closest, s, u, _ = self.__project(points.reshape(-1, 3), iterations, inside=False)
+        return closest.reshape(shape + (3,)), s.reshape(shape), u.reshape(shape)
+
+    def __project(self, points: np.ndarray, iterations: int, inside: bool):
+        """Projects (M, 3) world points onto the surface, returns (closest_points, s, u, inside or None)."""
+        s, u, res_inside = self.__sections(points, seed=True, inside=inside)
+        if s is None:
+            s, u = np.empty(0), np.empty(0)
+            res_inside = np.empty(0, dtype=bool) if inside else None
+        closest, _ = self.__evaluate(s, u)
+        dist2 = np.sum((points - closest)**2, axis=1)
+
+        active = np.arange(len(points))  # points still moving
+        for _ in range(iterations):
+            if len(active) == 0:
+                break
+            (surface_points, d_s, d_u, d_ss, d_su, d_uu), _ = self.__evaluate(s[active], u[active], order=2)
+            delta = points[active] - surface_points
+
+            # Newton step on the squared distance: solve H [ds, du] = J^T delta with H = J^T J - delta . d2S
+            # (Gauss-Newton, H = J^T J, where H is not positive definite), far from the surface Gauss-Newton alone is slow
+            gn_a = np.sum(d_s * d_s, axis=1)
+            gn_b = np.sum(d_s * d_u, axis=1)
+            gn_c = np.sum(d_u * d_u, axis=1)
+            a = gn_a - np.sum(delta * d_ss, axis=1)
+            b = gn_b - np.sum(delta * d_su, axis=1)
+            c = gn_c - np.sum(delta * d_uu, axis=1)
+            newton = (a > 0) & (a * c - b * b > 1e-12 * np.maximum(a * c, 1e-30))
+            a = np.where(newton, a, gn_a)
+            b = np.where(newton, b, gn_b)
+            c = np.where(newton, c, gn_c)
+            g_s = np.sum(d_s * delta, axis=1)
+            g_u = np.sum(d_u * delta, axis=1)
+            det = a * c - b * b
+            joint_ok = det > 1e-12 * np.maximum(a * c, 1e-30)
+            det = np.where(joint_ok, det, 1.0)
+            zeros = np.zeros(len(active))
+
+            joint_s = np.where(joint_ok, (c * g_s - b * g_u) / det, 0.0)
+            joint_u = np.where(joint_ok, (a * g_u - b * g_s) / det, 0.0)
+            only_s = np.where(a > 0, g_s / np.where(a > 0, a, 1.0), 0.0)
+            only_u = np.where(c > 0, g_u / np.where(c > 0, c, 1.0), 0.0)
+
+            # On the root or tip edge, a step leaving the span is replaced by a step along the edge
+            s_active = s[active]
+            at_bound = ((s_active <= 0.0) & (joint_s < 0)) | ((s_active >= 1.0) & (joint_s > 0))
+            joint_s = np.where(at_bound, 0.0, joint_s)
+            joint_u = np.where(at_bound, only_u, joint_u)
+            joint_ok = joint_ok | (at_bound & (c > 0))
+
+            # Fallbacks when the full joint step is not accepted (the rounded trailing edge is very curved in u): s alone, u alone
+            candidate_steps = [(joint_ok, joint_s, joint_u), (a > 0, only_s, zeros), (c > 0, zeros, only_u)]
+
+            # Each candidate step is halved until it brings the point closer, the best candidate is kept
+            best_s, best_u, best_dist2 = s[active], u[active], dist2[active]
+            full_step = np.zeros(len(active), dtype=bool)
+            for i, (step_ok, step_s, step_u) in enumerate(candidate_steps):
+                step_s, step_u = step_s.copy(), step_u.copy()
+                pending = np.flatnonzero(step_ok & ~full_step)  # positions in active
+                for halving in range(MAX_STEP_HALVINGS):
+                    if len(pending) == 0:
+                        break
+                    idx = active[pending]
+                    new_s = np.clip(s[idx] + step_s[pending], 0.0, 1.0)
+                    new_u = np.mod(u[idx] + step_u[pending], 1.0)  # u may cross the trailing edge
+                    new_closest, _ = self.__evaluate(new_s, new_u)
+                    new_dist2 = np.sum((points[idx] - new_closest)**2, axis=1)
+                    better = new_dist2 < dist2[idx]
+                    keep = better & (new_dist2 < best_dist2[pending])
+                    best_s[pending[keep]] = new_s[keep]
+                    best_u[pending[keep]] = new_u[keep]
+                    best_dist2[pending[keep]] = new_dist2[keep]
+                    if i == 0 and halving == 0:
+                        full_step[pending[better]] = True
+                    pending = pending[~better]
+                    step_s[pending] /= 2
+                    step_u[pending] /= 2
+
+            moved = best_dist2 < dist2[active]
+            step_size = np.maximum(np.abs(best_s - s[active]), np.abs(np.mod(best_u - u[active] + 0.5, 1.0) - 0.5))
+            s[active] = best_s
+            u[active] = best_u
+            dist2[active] = best_dist2
+
+            # A point has converged when no step improves its distance any more or when its step becomes negligible
+            active = active[moved & (step_size > STEP_TOLERANCE)]
+
+        closest, _ = self.__evaluate(s, u)
+        return closest, s, u, res_inside
+
+    def isInside(self, points) -> np.ndarray:
+        """Returns whether the points (shape (..., 3)) are inside the blade."""
+        points = np.asarray(points, dtype=float)
+        shape = points.shape[:-1]
+        _, _, inside = self.__sections(points.reshape(-1, 3), seed=False, inside=True)
+        return (inside if inside is not None else np.empty(0, dtype=bool)).reshape(shape)
+
+    def getSignedDistances(self, points, iterations: int = 30) -> np.ndarray:
+        """
+        Returns the distances from points (shape (..., 3)) to the blade (lateral surface, root and tip faces), negative inside.
+        The sign comes from isInside, not from the normal at the closest point (meaningless on the root and tip edges),
+        except within polygon_tolerance of the surface where the projection is orthogonal and the normal is reliable.
+        """
+        points = np.asarray(points, dtype=float)
+        shape = points.shape[:-1]
+        points = points.reshape(-1, 3)
+        closest, s, u, inside = self.__project(points, iterations, inside=True)
+        delta = points - closest
+        distances = np.linalg.norm(delta, axis=-1)
+
+        normal_side = np.sum(delta * self.getNormals(s, u), axis=-1)
+        orthogonal = np.abs(normal_side) > 0.99 * distances
+        use_normal = (distances < self.polygon_tolerance) & orthogonal & (s > 0) & (s < 1)
+        inside = np.where(use_normal, normal_side < 0, inside)
+
+        # Closer to the root or tip face: inside when between the two faces
+        cap_distances = self.__capDistances(points, distances)
+        on_cap = cap_distances < distances
+        r = self.__toLocal(points[on_cap])[:, 2]
+        inside[on_cap] = (r > self.r_min) & (r < self.r_max)
+        distances = np.minimum(distances, cap_distances)
+        return np.where(inside, -distances, distances).reshape(shape)
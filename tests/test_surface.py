@@ -0,0 +1,125 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from loc_utils.surface import BladeSurface
+
+# First blade of example.yaml
+BLADE_CONFIG = {
+    'angle': 30,
+    'radial_blade_offset': 1,
+    'profiles': [
+        {'naca': 2412, 'angle': -25, 'c': 2, 'radial_offset': 0, 'colinear_offset': 0},
+        {'naca': 2412, 'angle': -20, 'c': 1.8, 'radial_offset': 1, 'colinear_offset': 0},
+        {'naca': 2412, 'angle': -15, 'c': 1.5, 'radial_offset': 2, 'colinear_offset': 0},
+        {'naca': 2412, 'angle': -10, 'c': 1.2, 'radial_offset': 3, 'colinear_offset': 0},
+        {'naca': 2412, 'angle': -5, 'c': 0.8, 'radial_offset': 5, 'colinear_offset': 0},
+    ]
+}
+
+
+@pytest.fixture(scope="module")
+def surface():
+    return BladeSurface(BLADE_CONFIG)
+
+
+def toWorld(surface, local):
+    return (np.asarray(local) + surface.translation) @ surface.rotation.T
+
+
+def test_inner_section_matches_profile(surface):
+    points = surface.getPoints(0.0, surface.u_knots)
+    inner = surface.profiles[0].points
+    expected = toWorld(surface, np.column_stack((inner, np.zeros(len(inner)))))
+    assert np.allclose(points, expected, atol=1e-12)
+
+
+def test_normals_point_outward(surface):
+    s, u = np.meshgrid(np.linspace(0.05, 0.95, 10), np.r_[np.linspace(0.1, 0.4, 10), np.linspace(0.6, 0.9, 10)])
+    points = surface.getPoints(s, u)
+    normals = surface.getNormals(s, u)
+    assert np.allclose(np.linalg.norm(normals, axis=-1), 1)
+    assert not surface.isInside(points + 1e-3 * normals).any()
+    assert surface.isInside(points - 1e-3 * normals).all()
+
+
+def test_normals_continuous_across_trailing_edge(surface):
+    normals = surface.getNormals(0.5, [0.9999, 0.0, 1.0, 0.0001])
+    assert np.all(np.sum(normals[:-1] * normals[1:], axis=-1) > 0)
+
+
+def test_signed_distance_round_trip(surface):
+    rng = np.random.default_rng(0)
+    s = rng.uniform(0.05, 0.95, 2000)
+    u = np.where(rng.random(2000) < 0.5, rng.uniform(0.1, 0.4, 2000), rng.uniform(0.6, 0.9, 2000))
+    offsets = rng.uniform(-2e-3, 2e-3, 2000)
+    points = surface.getPoints(s, u) + offsets[:, None] * surface.getNormals(s, u)
+    assert np.allclose(surface.getSignedDistances(points), offsets, atol=1e-6)
+
+
+def test_closest_point_crosses_trailing_edge(surface):
+    point = surface.getPoints(0.5, 0.035) + 0.01 * surface.getNormals(0.5, 0.035)
+    assert surface.getSignedDistances(point) == pytest.approx(0.01, abs=1e-6)
+
+
+def test_closest_points_far_field(surface):
+    from scipy.spatial import cKDTree
+
+    # Brute force reference: dense sampling of the surface
+    s, u = np.meshgrid(np.linspace(0, 1, 400), np.linspace(0, 1, 2000), indexing='ij')
+    samples = surface.getPoints(s.ravel(), u.ravel())
+    tree = cKDTree(samples)
+
+    # Random points within 0.5 of the blade
+    rng = np.random.default_rng(0)
+    directions = rng.normal(size=(3000, 3))
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    points = surface.getPoints(rng.random(3000), rng.random(3000)) + rng.uniform(0, 0.5, (3000, 1)) * directions
+    reference, _ = tree.query(points)
+
+    closest, _, _ = surface.getClosestPoints(points)
+    distances = np.linalg.norm(points - closest, axis=-1)
+    assert np.all(distances <= reference + 1e-4)
+
+    # With the root and tip faces, sampled on their sections, the signed distances are never further than the samples
+    w = np.linspace(0, 1, 50)[:, None, None]
+    caps = np.concatenate([
+        ((1 - w) * surface.getPoints(s, 0.0) + w * surface.getPoints(s, np.linspace(0, 1, 200))).reshape(-1, 3)
+        for s in (0.0, 1.0)
+    ])
+    reference = np.minimum(reference, cKDTree(caps).query(points)[0])
+    signed_distances = surface.getSignedDistances(points)
+    assert np.all(np.abs(signed_distances) <= reference + 1e-4)
+
+
+def test_signs_near_trailing_edge_and_beyond_tip(surface):
+    te = surface.getPoints(0.5, 0.0)
+    chord = surface.getPoints(0.5, 0.0) - surface.getPoints(0.5, 0.5)
+    chord /= np.linalg.norm(chord)
+
+    # Behind the trailing edge, in the chord direction (the neighbouring sections may come a bit closer)
+    assert 0.15 < surface.getSignedDistances(te + 0.2 * chord) <= 0.2
+    # Between the upper and lower sides, close to the trailing edge
+    inside = (surface.getPoints(0.5, 0.03) + surface.getPoints(0.5, 0.97)) / 2
+    assert surface.getSignedDistances(inside) < 0
+    # Beyond the tip and before the root, in the middle of the section: the closest point is on the tip or root face
+    middle = (surface.getPoints(1.0, 0.25) + surface.getPoints(1.0, 0.75)) / 2
+    assert surface.isInside(middle - 1e-3 * surface.rotation[:, 2])
+    assert surface.getSignedDistances(middle + 0.5 * surface.rotation[:, 2]) == pytest.approx(0.5, abs=1e-9)
+    assert surface.getSignedDistances(middle + 1e-3 * surface.rotation[:, 2]) == pytest.approx(1e-3, abs=1e-9)
+    assert surface.getSignedDistances(middle - 1e-3 * surface.rotation[:, 2]) == pytest.approx(-1e-3, abs=1e-9)
+    root_middle = (surface.getPoints(0.0, 0.25) + surface.getPoints(0.0, 0.75)) / 2
+    assert surface.isInside(root_middle + 1e-3 * surface.rotation[:, 2])
+    assert not surface.isInside(root_middle - 1e-3 * surface.rotation[:, 2])
+    assert surface.getSignedDistances(root_middle + 1e-3 * surface.rotation[:, 2]) == pytest.approx(-1e-3, abs=1e-9)
+    assert surface.getSignedDistances(root_middle - 1e-3 * surface.rotation[:, 2]) == pytest.approx(1e-3, abs=1e-9)
+
+
+def test_list_angles():
+    config = dict(BLADE_CONFIG, angle=[0, 120, 240])
+    with pytest.raises(ValueError):
+        BladeSurface(config)
+    surfaces = BladeSurface.buildFromBladeConfig(config)
+    assert [surface.angle for surface in surfaces] == pytest.approx([0, 2 * np.pi / 3, 4 * np.pi / 3])
+    assert np.allclose(surfaces[1].getPoints(0.5, 0.5), surfaces[0].getPoints(0.5, 0.5) @ surfaces[1].rotation.T)